@@ -99,7 +99,7 @@ class ProjectArtifactBundleFileDetailsEndpoint(
             )
 
         try:
-            archive = ArtifactBundleArchive(artifact_bundle.file.getfile(), build_memory_map=False)
+            archive = ArtifactBundleArchive(artifact_bundle.file.getfile())
         except Exception as exc:
             sentry_sdk.capture_exception(exc)
             return Response(
@@ -92,7 +92,7 @@ class ProjectArtifactBundleFilesEndpoint(ProjectEndpoint):
 
         try:
             # We open the archive to fetch the number of files.
-            archive = ArtifactBundleArchive(artifact_bundle.file.getfile(), build_memory_map=False)
+            archive = ArtifactBundleArchive(artifact_bundle.file.getfile())
         except Exception:
             return Response(
                 {"error": f"The archive of artifact bundle {bundle_id} can't be opened"}
@@ -114,9 +114,7 @@ def _index_urls_in_bundle(
     existing_archive: ArtifactBundleArchive | None,
 ):
     # We first open up the bundle and extract all the things we want to index from it.
-    archive = existing_archive or ArtifactBundleArchive(
-        artifact_bundle.file.getfile(), build_memory_map=False
-    )
+    archive = existing_archive or ArtifactBundleArchive(artifact_bundle.file.getfile())
     urls_to_index = []
     try:
         for info in archive.get_files().values():
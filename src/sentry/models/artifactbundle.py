@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import zipfile
 from enum import Enum
+from functools import cached_property
 from typing import IO, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
 import sentry_sdk
@@ -48,11 +49,10 @@ class SourceFileType(Enum):
         if lowercase_key is None:
             return None
 
-        for key in cls:
-            if key.name.lower() == lowercase_key:
-                return SourceFileType(key.value)
+        return _SOURCE_FILE_TYPES_BY_LOWERCASE_KEY.get(lowercase_key)
 
-        return None
+
+_SOURCE_FILE_TYPES_BY_LOWERCASE_KEY = {key.name.lower(): key for key in SourceFileType}
 
 
 class ArtifactBundleIndexingState(Enum):
@@ -96,16 +96,20 @@ class ArtifactBundle(Model):
     ) -> List[Mapping[str, str | None]]:
         # We sort by id, since it's the best (already existing) field to define total order of
         # release associations that is somehow consistent with upload sequence.
-        release_artifact_bundles = ReleaseArtifactBundle.objects.filter(
-            organization_id=organization_id, artifact_bundle=artifact_bundle
-        ).order_by("-id")
+        release_artifact_bundles = (
+            ReleaseArtifactBundle.objects.filter(
+                organization_id=organization_id, artifact_bundle=artifact_bundle
+            )
+            .order_by("-id")
+            .values_list("release_name", "dist_name")
+        )
 
         return [
             {
-                "release": release_artifact_bundle.release_name,
-                "dist": release_artifact_bundle.dist_name or None,
+                "release": release_name,
+                "dist": dist_name or None,
             }
-            for release_artifact_bundle in release_artifact_bundles
+            for release_name, dist_name in release_artifact_bundles
         ]
 
     @classmethod
@@ -304,18 +308,13 @@ class ProjectArtifactBundle(Model):
 class ArtifactBundleArchive:
     """Read-only view of uploaded ZIP artifact bundle."""
 
-    def __init__(self, fileobj: IO, build_memory_map: bool = True):
+    def __init__(self, fileobj: IO):
         self._fileobj = fileobj
         self._zip_file = zipfile.ZipFile(self._fileobj)
-        self._entries_by_debug_id = {}
-        self._entries_by_url = {}
 
         self.manifest = self._read_manifest()
         self.artifact_count = len(self.manifest.get("files", {}))
 
-        if build_memory_map:
-            self._build_memory_maps()
-
     def __enter__(self):
         return self
 
@@ -334,12 +333,22 @@ class ArtifactBundleArchive:
 
     def _read_manifest(self) -> dict:
         manifest_bytes = self.read("manifest.json")
-        return json.loads(manifest_bytes.decode("utf-8"))
+        return json.loads(manifest_bytes, use_rapid_json=True)
 
     @staticmethod
     def normalize_headers(headers: dict) -> dict:
         return {k.lower(): v for k, v in headers.items()}
 
+    @staticmethod
+    def get_debug_id_header(headers: dict) -> Optional[str]:
+        # Equivalent to `normalize_headers(headers).get("debug-id")`, without building the normalized dict, since most
+        # files in a bundle don't carry a debug-id at all.
+        for key, value in headers.items():
+            if key.lower() == "debug-id":
+                return value
+
+        return None
+
     @staticmethod
     def normalize_debug_id(debug_id: Optional[str]) -> Optional[str]:
         if debug_id is None:
@@ -350,31 +359,42 @@ class ArtifactBundleArchive:
         except SymbolicError:
             return None
 
-    def _build_memory_maps(self):
+    # The lookup maps below are built lazily on first access, since many callers only need the manifest or a
+    # single file and would otherwise pay for normalizing every entry of the bundle upfront.
+    @cached_property
+    def _entries_by_debug_id(self) -> Dict[Tuple[str, SourceFileType], Tuple[str, str, dict]]:
+        entries_by_debug_id = {}
+
         files = self.manifest.get("files", {})
         for file_path, info in files.items():
             url = info.get("url")
             if not url:
                 continue
-            # Building the map for debug_id lookup.
-            headers = self.normalize_headers(info.get("headers", {}))
-            if (debug_id := headers.get("debug-id")) is not None:
-                debug_id = self.normalize_debug_id(debug_id)
-                file_type = info.get("type")
-                if (
-                    debug_id is not None
-                    and file_type is not None
-                    and (source_file_type := SourceFileType.from_lowercase_key(file_type))
-                    is not None
-                ):
-                    self._entries_by_debug_id[(debug_id, source_file_type)] = (
-                        file_path,
-                        url,
-                        info,
-                    )
 
-            # Building the map for url lookup.
-            self._entries_by_url[url] = (file_path, info)
+            debug_id = self.get_debug_id_header(info.get("headers", {}))
+            if debug_id is None:
+                continue
+
+            # We resolve the file type before normalizing the debug_id, since the latter goes through symbolic.
+            source_file_type = SourceFileType.from_lowercase_key(info.get("type"))
+            if source_file_type is None:
+                continue
+
+            if (debug_id := self.normalize_debug_id(debug_id)) is not None:
+                entries_by_debug_id[(debug_id, source_file_type)] = (file_path, url, info)
+
+        return entries_by_debug_id
+
+    @cached_property
+    def _entries_by_url(self) -> Dict[str, Tuple[str, dict]]:
+        entries_by_url = {}
+
+        files = self.manifest.get("files", {})
+        for file_path, info in files.items():
+            if url := info.get("url"):
+                entries_by_url[url] = (file_path, info)
+
+        return entries_by_url
 
     def get_all_urls(self) -> List[str]:
         return [url for url in self._entries_by_url.keys()]
@@ -421,33 +441,50 @@ class ArtifactBundleArchive:
 
         return results
 
-    def get_files_by_url_or_debug_id(self, query: Optional[str]) -> Dict[str, dict]:
-        def filter_function(_: str, info: dict) -> bool:
-            if query is None:
-                return True
-
-            normalized_query = query.lower()
+    @cached_property
+    def _search_index(self) -> List[Tuple[str, str, Optional[str]]]:
+        # We keep the lowercased url and normalized debug_id of each file around, so that repeated searches don't
+        # have to normalize the headers and debug_ids of every file for every query.
+        search_index = []
 
-            if normalized_query in info.get("url", "").lower():
-                return True
+        files = self.manifest.get("files", {})
+        for file_path, info in files.items():
+            debug_id = self.normalize_debug_id(self.get_debug_id_header(info.get("headers", {})))
+            search_index.append(
+                (
+                    file_path,
+                    (info.get("url") or "").lower(),
+                    debug_id.lower() if debug_id is not None else None,
+                )
+            )
 
-            headers = self.normalize_headers(info.get("headers", {}))
-            debug_id = self.normalize_debug_id(headers.get("debug-id", None))
-            if debug_id is not None:
-                debug_id = debug_id.lower()
+        return search_index
 
-                if normalized_query in debug_id:
-                    return True
+    def get_files_by_url_or_debug_id(self, query: Optional[str]) -> Dict[str, dict]:
+        files = self.manifest.get("files", {})
+        if query is None:
+            return dict(files)
 
-                # We also want to try and normalize the query so that we can match for example:
-                # 2b69e5bd2e984c578ce1b58da19110ae with 2b69e5bd-2e98-4c57-8ce1-b58da19110ae.
-                normalized_query = self.normalize_debug_id(normalized_query)
-                if normalized_query is not None and normalized_query in debug_id:
-                    return True
+        normalized_query = query.lower()
+        # We also want to try and normalize the query so that we can match for example:
+        # 2b69e5bd2e984c578ce1b58da19110ae with 2b69e5bd-2e98-4c57-8ce1-b58da19110ae.
+        normalized_debug_id_query = self.normalize_debug_id(normalized_query)
 
-            return False
+        results = {}
+        for file_path, url, debug_id in self._search_index:
+            if normalized_query in url or (
+                debug_id is not None
+                and (
+                    normalized_query in debug_id
+                    or (
+                        normalized_debug_id_query is not None
+                        and normalized_debug_id_query in debug_id
+                    )
+                )
+            ):
+                results[file_path] = files[file_path]
 
-        return self.get_files_by(filter_function)
+        return results
 
     def get_file_info(self, file_path: Optional[str]) -> Optional[zipfile.ZipInfo]:
         try:
@@ -95,6 +95,11 @@ from sentry.search.utils import DEVICE_CLASS
 from sentry.snuba.referrer import Referrer
 from sentry.utils.numbers import format_grouped_length
 
+# The value under which the default project threshold metric is stored in the database.
+DEFAULT_PROJECT_THRESHOLD_METRIC_VALUE = {
+    metric: value for value, metric in TRANSACTION_METRICS.items()
+}[DEFAULT_PROJECT_THRESHOLD_METRIC]
+
 
 class DiscoverDatasetConfig(DatasetConfig):
     custom_threshold_columns = {
@@ -1042,32 +1047,44 @@ class DiscoverDatasetConfig(DatasetConfig):
         )
         project_ids = self.builder.params.project_ids
 
-        project_threshold_configs = (
+        # The configs are materialized right away, since we need both their count and their rows, and counting
+        # the querysets separately would cost an extra query each. Fetching one more row than the limit is enough to
+        # tell when it's exceeded.
+        project_threshold_configs = list(
             ProjectTransactionThreshold.objects.filter(
                 organization_id=org_id,
                 project_id__in=project_ids,
             )
+            # Configurations equal to the default are skipped in the final query anyway, so we don't fetch them.
+            .exclude(
+                threshold=DEFAULT_PROJECT_THRESHOLD,
+                metric=DEFAULT_PROJECT_THRESHOLD_METRIC_VALUE,
+            )
             .order_by("project_id")
-            .values_list("project_id", "threshold", "metric")
+            .values_list("project_id", "threshold", "metric")[
+                : MAX_QUERYABLE_TRANSACTION_THRESHOLDS + 1
+            ]
         )
 
-        transaction_threshold_configs = (
+        transaction_threshold_configs = list(
             ProjectTransactionThresholdOverride.objects.filter(
                 organization_id=org_id,
                 project_id__in=project_ids,
             )
             .order_by("project_id")
-            .values_list("transaction", "project_id", "threshold", "metric")
+            .values_list("transaction", "project_id", "threshold", "metric")[
+                : MAX_QUERYABLE_TRANSACTION_THRESHOLDS + 1
+            ]
         )
 
-        num_project_thresholds = project_threshold_configs.count()
+        num_project_thresholds = len(project_threshold_configs)
         sentry_sdk.set_tag("project_threshold.count", num_project_thresholds)
         sentry_sdk.set_tag(
             "project_threshold.count.grouped",
             format_grouped_length(num_project_thresholds, [10, 100, 250, 500]),
         )
 
-        num_transaction_thresholds = transaction_threshold_configs.count()
+        num_transaction_thresholds = len(transaction_threshold_configs)
         sentry_sdk.set_tag("txn_threshold.count", num_transaction_thresholds)
         sentry_sdk.set_tag(
             "txn_threshold.count.grouped",
@@ -1089,36 +1106,22 @@ class DiscoverDatasetConfig(DatasetConfig):
         project_threshold_config_values = []
         for project_id, threshold, metric in project_threshold_configs:
             metric = TRANSACTION_METRICS[metric]
-            if (
-                threshold == DEFAULT_PROJECT_THRESHOLD
-                and metric == DEFAULT_PROJECT_THRESHOLD_METRIC
-            ):
-                # small optimization, if the configuration is equal to the default,
-                # we can skip it in the final query
-                continue
-
             project_thresholds[project_id] = (metric, threshold)
             project_threshold_config_keys.append(Function("toUInt64", [project_id]))
             project_threshold_config_values.append((metric, threshold))
 
+        default_project_threshold = (DEFAULT_PROJECT_THRESHOLD_METRIC, DEFAULT_PROJECT_THRESHOLD)
         project_threshold_override_config_keys = []
         project_threshold_override_config_values = []
         for transaction, project_id, threshold, metric in transaction_threshold_configs:
             metric = TRANSACTION_METRICS[metric]
-            if (
-                project_id in project_thresholds
-                and threshold == project_thresholds[project_id][1]
-                and metric == project_thresholds[project_id][0]
-            ):
+            project_threshold = project_thresholds.get(project_id)
+            if project_threshold == (metric, threshold):
                 # small optimization, if the configuration is equal to the project
                 # configs, we can skip it in the final query
                 continue
 
-            elif (
-                project_id not in project_thresholds
-                and threshold == DEFAULT_PROJECT_THRESHOLD
-                and metric == DEFAULT_PROJECT_THRESHOLD_METRIC
-            ):
+            elif project_threshold is None and (metric, threshold) == default_project_threshold:
                 # small optimization, if the configuration is equal to the default
                 # and no project configs were set, we can skip it in the final query
                 continue
@@ -1128,26 +1131,17 @@ class DiscoverDatasetConfig(DatasetConfig):
             )
             project_threshold_override_config_values.append((metric, threshold))
 
-        project_threshold_config_index: SelectType = Function(
-            "indexOf",
-            [
-                project_threshold_config_keys,
-                self.builder.column("project_id"),
-            ],
-            PROJECT_THRESHOLD_CONFIG_INDEX_ALIAS,
-        )
-
-        project_threshold_override_config_index: SelectType = Function(
-            "indexOf",
-            [
-                project_threshold_override_config_keys,
-                (self.builder.column("project_id"), self.builder.column("transaction")),
-            ],
-            PROJECT_THRESHOLD_OVERRIDE_CONFIG_INDEX_ALIAS,
-        )
-
         def _project_threshold_config(alias: Optional[str] = None) -> SelectType:
             if project_threshold_config_keys and project_threshold_config_values:
+                project_threshold_config_index: SelectType = Function(
+                    "indexOf",
+                    [
+                        project_threshold_config_keys,
+                        self.builder.column("project_id"),
+                    ],
+                    PROJECT_THRESHOLD_CONFIG_INDEX_ALIAS,
+                )
+
                 return Function(
                     "if",
                     [
@@ -1177,6 +1171,15 @@ class DiscoverDatasetConfig(DatasetConfig):
             )
 
         if project_threshold_override_config_keys and project_threshold_override_config_values:
+            project_threshold_override_config_index: SelectType = Function(
+                "indexOf",
+                [
+                    project_threshold_override_config_keys,
+                    (self.builder.column("project_id"), self.builder.column("transaction")),
+                ],
+                PROJECT_THRESHOLD_OVERRIDE_CONFIG_INDEX_ALIAS,
+            )
+
             return Function(
                 "if",
                 [
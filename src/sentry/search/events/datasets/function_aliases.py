@@ -30,19 +30,23 @@ def resolve_project_threshold_config(
     and search/events/datasets.
     """
 
-    project_threshold_configs = ProjectTransactionThreshold.filter(
-        organization_id=org_id,
-        project_ids=project_ids,
-        order_by=["project_id"],
-        value_list=["project_id", "metric"],
-    )
+    if project_ids:
+        project_threshold_configs = ProjectTransactionThreshold.filter(
+            organization_id=org_id,
+            project_ids=project_ids,
+            order_by=["project_id"],
+            value_list=["project_id", "metric"],
+        )
 
-    transaction_threshold_configs = ProjectTransactionThresholdOverride.filter(
-        organization_id=org_id,
-        project_ids=project_ids,
-        order_by=["project_id"],
-        value_list=["transaction", "project_id", "metric"],
-    )
+        transaction_threshold_configs = ProjectTransactionThresholdOverride.filter(
+            organization_id=org_id,
+            project_ids=project_ids,
+            order_by=["project_id"],
+            value_list=["transaction", "project_id", "metric"],
+        )
+    else:
+        project_threshold_configs = []
+        transaction_threshold_configs = []
 
     num_project_thresholds = len(project_threshold_configs)
     num_transaction_thresholds = len(transaction_threshold_configs)
@@ -75,13 +79,14 @@ def resolve_project_threshold_config(
     project_threshold_override_config_values = []
     for transaction, project_id, metric in transaction_threshold_configs:
         metric = TRANSACTION_METRICS[metric]
-        if project_id in project_thresholds and metric == project_thresholds[project_id][0]:
+        project_threshold_metric = project_thresholds.get(project_id)
+        if project_threshold_metric == metric:
             # small optimization, if the configuration is equal to the project
             # configs, we can skip it in the final query
             continue
 
         elif (
-            project_id not in project_thresholds
+            project_threshold_metric is None
             and metric == constants.DEFAULT_PROJECT_THRESHOLD_METRIC
         ):
             # small optimization, if the configuration is equal to the default
@@ -100,29 +105,17 @@ def resolve_project_threshold_config(
         )
         project_threshold_override_config_values.append(metric)
 
-    project_threshold_config_index: SelectType = Function(
-        "indexOf",
-        [
-            project_threshold_config_keys,
-            Column(name="project_id"),
-        ],
-        constants.PROJECT_THRESHOLD_CONFIG_INDEX_ALIAS,
-    )
-
-    project_threshold_override_config_index: SelectType = Function(
-        "indexOf",
-        [
-            project_threshold_override_config_keys,
-            (
-                Column(name="project_id"),
-                Column(name=column_name_resolver(use_case_id, org_id, "transaction")),
-            ),
-        ],
-        constants.PROJECT_THRESHOLD_OVERRIDE_CONFIG_INDEX_ALIAS,
-    )
-
     def _project_threshold_config(alias=None):
         if project_threshold_config_keys and project_threshold_config_values:
+            project_threshold_config_index: SelectType = Function(
+                "indexOf",
+                [
+                    project_threshold_config_keys,
+                    Column(name="project_id"),
+                ],
+                constants.PROJECT_THRESHOLD_CONFIG_INDEX_ALIAS,
+            )
+
             return Function(
                 "if",
                 [
@@ -151,6 +144,18 @@ def resolve_project_threshold_config(
         )
 
     if project_threshold_override_config_keys and project_threshold_override_config_values:
+        project_threshold_override_config_index: SelectType = Function(
+            "indexOf",
+            [
+                project_threshold_override_config_keys,
+                (
+                    Column(name="project_id"),
+                    Column(name=column_name_resolver(use_case_id, org_id, "transaction")),
+                ),
+            ],
+            constants.PROJECT_THRESHOLD_OVERRIDE_CONFIG_INDEX_ALIAS,
+        )
+
         return Function(
             "if",
             [
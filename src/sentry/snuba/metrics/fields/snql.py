@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Optional, Sequence
+from typing import Any, Mapping, Optional, Sequence
 
 from snuba_sdk import Column, Function
 
@@ -23,6 +23,48 @@ from sentry.snuba.metrics.naming_layer.public import (
     TransactionStatusTagValue,
     TransactionTagsKey,
 )
+from sentry.utils.request_cache import request_cache
+
+# The tag keys and values of the `if` columns are arbitrary strings that may have to go through the indexer, thus we
+# memoize them for the duration of the request. The snippets of the derived metrics below that only depend on their
+# arguments are memoized the same way.
+_resolve_tag_key = request_cache(resolve_tag_key)
+_resolve_tag_value = request_cache(resolve_tag_value)
+
+# Columns don't change once built, so the ones referenced by most of the snippets below are shared between them.
+_VALUE_COLUMN = Column("value")
+_METRIC_ID_COLUMN = Column("metric_id")
+_PROJECT_ID_COLUMN = Column("project_id")
+
+
+def _session_status_column(org_id: int) -> Column:
+    return Column(resolve_tag_key(UseCaseID.SESSIONS, org_id, "session.status"))
+
+
+def _transaction_status_column(org_id: int) -> Column:
+    return Column(
+        resolve_tag_key(UseCaseID.TRANSACTIONS, org_id, TransactionTagsKey.TRANSACTION_STATUS.value)
+    )
+
+
+def _transaction_satisfaction_column(org_id: int) -> Column:
+    return Column(
+        resolve_tag_key(
+            UseCaseID.TRANSACTIONS, org_id, TransactionTagsKey.TRANSACTION_SATISFACTION.value
+        )
+    )
+
+
+def _transaction_column(org_id: int) -> Column:
+    return Column(resolve_tag_key(UseCaseID.TRANSACTIONS, org_id, "transaction"))
+
+
+# Statuses which are not counted as failures, see https://docs.sentry.io/product/performance/metrics/#failure-rate
+_FAILURE_EXCLUDED_TX_STATUSES = (
+    TransactionStatusTagValue.OK.value,
+    TransactionStatusTagValue.CANCELLED.value,
+    TransactionStatusTagValue.UNKNOWN.value,
+)
 
 
 def _aggregation_on_session_status_func_factory(aggregate) -> Function:
@@ -32,24 +74,18 @@ def _aggregation_on_session_status_func_factory(aggregate) -> Function:
         return Function(
             aggregate,
             [
-                Column("value"),
+                _VALUE_COLUMN,
                 Function(
                     "and",
                     [
                         Function(
                             "equals",
                             [
-                                Column(
-                                    resolve_tag_key(
-                                        UseCaseID.SESSIONS,
-                                        org_id,
-                                        "session.status",
-                                    )
-                                ),
+                                _session_status_column(org_id),
                                 resolve_tag_value(UseCaseID.SESSIONS, org_id, session_status),
                             ],
                         ),
-                        Function("in", [Column("metric_id"), list(metric_ids)]),
+                        Function("in", [_METRIC_ID_COLUMN, list(metric_ids)]),
                     ],
                 ),
             ],
@@ -97,12 +133,12 @@ def _aggregation_on_abnormal_mechanism_func_factory(
     return Function(
         "uniqIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
                     abnormal_mechanism_condition,
-                    Function("in", [Column("metric_id"), list(metric_ids)]),
+                    Function("in", [_METRIC_ID_COLUMN, list(metric_ids)]),
                 ],
             ),
         ],
@@ -110,38 +146,32 @@ def _aggregation_on_abnormal_mechanism_func_factory(
     )
 
 
+# The aggregation functions are built once at import time, rather than creating a new closure on every call.
+_sum_if_on_session_status = _aggregation_on_session_status_func_factory(aggregate="sumIf")
+_uniq_if_on_session_status = _aggregation_on_session_status_func_factory(aggregate="uniqIf")
+
+
 def _counter_sum_aggregation_on_session_status_factory(
     org_id: int, session_status: str, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
-    return _aggregation_on_session_status_func_factory(aggregate="sumIf")(
-        org_id, session_status, metric_ids, alias
-    )
+    return _sum_if_on_session_status(org_id, session_status, metric_ids, alias)
 
 
 def _set_uniq_aggregation_on_session_status_factory(
     org_id: int, session_status: str, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
-    return _aggregation_on_session_status_func_factory(aggregate="uniqIf")(
-        org_id, session_status, metric_ids, alias
-    )
+    return _uniq_if_on_session_status(org_id, session_status, metric_ids, alias)
 
 
 def _aggregation_on_tx_status_func_factory(aggregate: Function) -> Function:
     def _get_snql_conditions(
-        org_id: int, metric_ids: Sequence[int], exclude_tx_statuses: list[str]
+        org_id: int, metric_ids: Sequence[int], exclude_tx_statuses: Sequence[str]
     ) -> Function:
-        metric_match = Function("in", [Column("metric_id"), list(metric_ids)])
-        assert exclude_tx_statuses is not None
+        metric_match = Function("in", [_METRIC_ID_COLUMN, list(metric_ids)])
         if len(exclude_tx_statuses) == 0:
             return metric_match
 
-        tx_col = Column(
-            resolve_tag_key(
-                UseCaseID.TRANSACTIONS,
-                org_id,
-                TransactionTagsKey.TRANSACTION_STATUS.value,
-            )
-        )
+        tx_col = _transaction_status_column(org_id)
         excluded_statuses = resolve_tag_values(UseCaseID.TRANSACTIONS, org_id, exclude_tx_statuses)
         exclude_tx_statuses = Function(
             "notIn",
@@ -161,14 +191,14 @@ def _aggregation_on_tx_status_func_factory(aggregate: Function) -> Function:
 
     def _snql_on_tx_status_factory(
         org_id: int,
-        exclude_tx_statuses: list[str],
+        exclude_tx_statuses: Sequence[str],
         metric_ids: Sequence[int],
         alias: Optional[str] = None,
     ) -> Function:
         return Function(
             aggregate,
             [
-                Column("value"),
+                _VALUE_COLUMN,
                 _get_snql_conditions(org_id, metric_ids, exclude_tx_statuses),
             ],
             alias,
@@ -177,15 +207,16 @@ def _aggregation_on_tx_status_func_factory(aggregate: Function) -> Function:
     return _snql_on_tx_status_factory
 
 
+_count_if_on_tx_status = _aggregation_on_tx_status_func_factory("countIf")
+
+
 def _dist_count_aggregation_on_tx_status_factory(
     org_id: int,
-    exclude_tx_statuses: list[str],
+    exclude_tx_statuses: Sequence[str],
     metric_ids: Sequence[int],
     alias: Optional[str] = None,
 ) -> Function:
-    return _aggregation_on_tx_status_func_factory("countIf")(
-        org_id, exclude_tx_statuses, metric_ids, alias
-    )
+    return _count_if_on_tx_status(org_id, exclude_tx_statuses, metric_ids, alias)
 
 
 def _aggregation_on_tx_satisfaction_func_factory(aggregate: Function) -> Function:
@@ -195,26 +226,20 @@ def _aggregation_on_tx_satisfaction_func_factory(aggregate: Function) -> Functio
         return Function(
             aggregate,
             [
-                Column("value"),
+                _VALUE_COLUMN,
                 Function(
                     "and",
                     [
                         Function(
                             "equals",
                             [
-                                Column(
-                                    resolve_tag_key(
-                                        UseCaseID.TRANSACTIONS,
-                                        org_id,
-                                        TransactionTagsKey.TRANSACTION_SATISFACTION.value,
-                                    )
-                                ),
+                                _transaction_satisfaction_column(org_id),
                                 resolve_tag_value(
                                     UseCaseID.TRANSACTIONS, org_id, satisfaction_value
                                 ),
                             ],
                         ),
-                        Function("in", [Column("metric_id"), list(metric_ids)]),
+                        Function("in", [_METRIC_ID_COLUMN, list(metric_ids)]),
                     ],
                 ),
             ],
@@ -224,18 +249,20 @@ def _aggregation_on_tx_satisfaction_func_factory(aggregate: Function) -> Functio
     return _snql_on_tx_satisfaction_factory
 
 
+_count_if_on_tx_satisfaction = _aggregation_on_tx_satisfaction_func_factory("countIf")
+_uniq_if_on_tx_satisfaction = _aggregation_on_tx_satisfaction_func_factory("uniqIf")
+
+
 def _dist_count_aggregation_on_tx_satisfaction_factory(
     org_id: int, satisfaction: str, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
-    return _aggregation_on_tx_satisfaction_func_factory("countIf")(
-        org_id, satisfaction, metric_ids, alias
-    )
+    return _count_if_on_tx_satisfaction(org_id, satisfaction, metric_ids, alias)
 
 
 def _set_count_aggregation_on_tx_satisfaction_factory(
     org_id: int, satisfaction: str, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
-    return _aggregation_on_tx_satisfaction_func_factory("uniqIf")(
+    return _uniq_if_on_tx_satisfaction(
         org_id=org_id,
         satisfaction_value=satisfaction,
         metric_ids=metric_ids,
@@ -243,6 +270,7 @@ def _set_count_aggregation_on_tx_satisfaction_factory(
     )
 
 
+@request_cache
 def all_sessions(org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None) -> Function:
     return _counter_sum_aggregation_on_session_status_factory(
         org_id, session_status="init", metric_ids=metric_ids, alias=alias
@@ -253,6 +281,7 @@ def all_users(org_id: int, metric_ids: Sequence[int], alias: Optional[str] = Non
     return uniq_aggregation_on_metric(metric_ids, alias)
 
 
+@request_cache
 def crashed_sessions(
     org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
@@ -261,6 +290,7 @@ def crashed_sessions(
     )
 
 
+@request_cache
 def crashed_users(org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None) -> Function:
     return _set_uniq_aggregation_on_session_status_factory(
         org_id, session_status="crashed", metric_ids=metric_ids, alias=alias
@@ -287,6 +317,7 @@ def foreground_anr_users(
     )
 
 
+@request_cache
 def errored_preaggr_sessions(
     org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
@@ -295,6 +326,7 @@ def errored_preaggr_sessions(
     )
 
 
+@request_cache
 def abnormal_sessions(
     org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
@@ -303,12 +335,14 @@ def abnormal_sessions(
     )
 
 
+@request_cache
 def abnormal_users(org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None) -> Function:
     return _set_uniq_aggregation_on_session_status_factory(
         org_id, session_status="abnormal", metric_ids=metric_ids, alias=alias
     )
 
 
+@request_cache
 def errored_all_users(
     org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
@@ -321,11 +355,11 @@ def uniq_aggregation_on_metric(metric_ids: Sequence[int], alias: Optional[str] =
     return Function(
         "uniqIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "in",
                 [
-                    Column("metric_id"),
+                    _METRIC_ID_COLUMN,
                     list(metric_ids),
                 ],
             ),
@@ -334,17 +368,13 @@ def uniq_aggregation_on_metric(metric_ids: Sequence[int], alias: Optional[str] =
     )
 
 
+@request_cache
 def failure_count_transaction(
     org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
     return _dist_count_aggregation_on_tx_status_factory(
         org_id,
-        exclude_tx_statuses=[
-            # See statuses in https://docs.sentry.io/product/performance/metrics/#failure-rate
-            TransactionStatusTagValue.OK.value,
-            TransactionStatusTagValue.CANCELLED.value,
-            TransactionStatusTagValue.UNKNOWN.value,
-        ],
+        exclude_tx_statuses=_FAILURE_EXCLUDED_TX_STATUSES,
         metric_ids=metric_ids,
         alias=alias,
     )
@@ -374,12 +404,12 @@ def http_error_count_transaction(
     return Function(
         "countIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
                     base_condition,
-                    Function("in", [Column("metric_id"), list(metric_ids)]),
+                    Function("in", [_METRIC_ID_COLUMN, list(metric_ids)]),
                 ],
             ),
         ],
@@ -394,8 +424,8 @@ def all_spans(
     return Function(
         "countIf",
         [
-            Column("value"),
-            Function("in", [Column("metric_id"), list(metric_ids)]),
+            _VALUE_COLUMN,
+            Function("in", [_METRIC_ID_COLUMN, list(metric_ids)]),
         ],
         alias,
     )
@@ -425,12 +455,12 @@ def http_error_count_span(
     return Function(
         "countIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
                     base_condition,
-                    Function("in", [Column("metric_id"), list(metric_ids)]),
+                    Function("in", [_METRIC_ID_COLUMN, list(metric_ids)]),
                 ],
             ),
         ],
@@ -438,14 +468,20 @@ def http_error_count_span(
     )
 
 
-def _project_threshold_multi_if_function(
-    project_ids: Sequence[int], org_id: int, metric_ids: Sequence[int]
-) -> Function:
-    metric_ids_dictionary = {
+@request_cache
+def _metric_ids_by_mri(org_id: int, metric_ids: Sequence[int]) -> Mapping[Optional[str], int]:
+    return {
         reverse_resolve_weak(UseCaseID.TRANSACTIONS, org_id, metric_id): metric_id
         for metric_id in metric_ids
     }
 
+
+def _project_threshold_multi_if_function(
+    project_ids: Sequence[int], org_id: int, metric_ids: Sequence[int]
+) -> Function:
+    # Only the threshold config depends on the projects, the metric ids are the same for all the snippets of a query.
+    metric_ids_dictionary = _metric_ids_by_mri(org_id, metric_ids)
+
     return Function(
         "multiIf",
         [
@@ -469,13 +505,7 @@ def _satisfaction_equivalence(org_id: int, satisfaction_tag_value: str) -> Funct
     return Function(
         "equals",
         [
-            Column(
-                name=resolve_tag_key(
-                    UseCaseID.TRANSACTIONS,
-                    org_id,
-                    TransactionTagsKey.TRANSACTION_SATISFACTION.value,
-                )
-            ),
+            _transaction_satisfaction_column(org_id),
             resolve_tag_value(UseCaseID.TRANSACTIONS, org_id, satisfaction_tag_value),
         ],
     )
@@ -485,7 +515,7 @@ def _metric_id_equivalence(metric_condition: Function) -> Function:
     return Function(
         "equals",
         [
-            Column("metric_id"),
+            _METRIC_ID_COLUMN,
             metric_condition,
         ],
     )
@@ -508,13 +538,14 @@ def _count_if_with_conditions(
     return Function(
         "countIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             _generate_conditions(conditions),
         ],
         alias,
     )
 
 
+@request_cache
 def satisfaction_count_transaction(
     project_ids: Sequence[int],
     org_id: int,
@@ -532,6 +563,7 @@ def satisfaction_count_transaction(
     )
 
 
+@request_cache
 def tolerated_count_transaction(
     project_ids: Sequence[int],
     org_id: int,
@@ -549,6 +581,7 @@ def tolerated_count_transaction(
     )
 
 
+@request_cache
 def all_transactions(
     project_ids: Sequence[int],
     org_id: int,
@@ -573,6 +606,7 @@ def apdex(satisfactory_snql, tolerable_snql, total_snql, alias: Optional[str] =
     )
 
 
+@request_cache
 def miserable_users(
     org_id: int, metric_ids: Sequence[int], alias: Optional[str] = None
 ) -> Function:
@@ -612,7 +646,7 @@ def session_duration_filters(org_id) -> Function:
         Function(
             "equals",
             (
-                Column(resolve_tag_key(UseCaseID.SESSIONS, org_id, "session.status")),
+                _session_status_column(org_id),
                 resolve_tag_value(UseCaseID.SESSIONS, org_id, "exited"),
             ),
         )
@@ -638,7 +672,7 @@ def histogram_snql_factory(
 
     return Function(
         f"histogramIf({MAX_HISTOGRAM_BUCKET})",
-        [Column("value"), conditions],
+        [_VALUE_COLUMN, conditions],
         alias=alias,
     )
 
@@ -652,7 +686,7 @@ def rate_snql_factory(
     return Function(
         "divide",
         [
-            Function("countIf", [Column("value"), aggregate_filter]),
+            Function("countIf", [_VALUE_COLUMN, aggregate_filter]),
             Function("divide", [numerator, denominator]),
         ],
         alias=alias,
@@ -665,7 +699,7 @@ def count_web_vitals_snql_factory(
     return Function(
         "countIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
@@ -688,60 +722,62 @@ def count_web_vitals_snql_factory(
     )
 
 
+def _unparameterized_transaction_name_filter(org_id: int, operation: str) -> Function:
+    return Function(
+        operation,
+        [
+            _transaction_column(org_id),
+            resolve_tag_value(UseCaseID.TRANSACTIONS, org_id, "<< unparameterized >>"),
+        ],
+    )
+
+
+def _null_transaction_name_filter(org_id: int, operation: str) -> Function:
+    return Function(operation, [_transaction_column(org_id), ""])
+
+
+def _is_unparameterized_transaction_name_filter(org_id: int) -> Function:
+    return _unparameterized_transaction_name_filter(org_id, "equals")
+
+
+def _is_null_transaction_name_filter(org_id: int) -> Function:
+    return _null_transaction_name_filter(org_id, "equals")
+
+
+def _has_value_transaction_name_filter(org_id: int) -> Function:
+    return Function(
+        "and",
+        [
+            _null_transaction_name_filter(org_id, "notEquals"),
+            _unparameterized_transaction_name_filter(org_id, "notEquals"),
+        ],
+    )
+
+
+_TRANSACTION_NAME_FILTERS = {
+    "is_unparameterized": _is_unparameterized_transaction_name_filter,
+    "is_null": _is_null_transaction_name_filter,
+    "has_value": _has_value_transaction_name_filter,
+}
+
+
 def count_transaction_name_snql_factory(
     aggregate_filter: Function, org_id: int, transaction_name, alias: Optional[str] = None
 ) -> Function:
-    is_unparameterized = "is_unparameterized"
-    is_null = "is_null"
-    has_value = "has_value"
-
-    def generate_transaction_name_filter(operation, transaction_name_identifier) -> Function:
-        if transaction_name_identifier == is_unparameterized:
-            inner_tag_value = resolve_tag_value(
-                UseCaseID.TRANSACTIONS, org_id, "<< unparameterized >>"
-            )
-        elif transaction_name_identifier == is_null:
-            inner_tag_value = ""
-        else:
-            raise InvalidParams("Invalid condition for tag value filter")
-
-        return Function(
-            operation,
-            [
-                Column(
-                    resolve_tag_key(
-                        UseCaseID.TRANSACTIONS,
-                        org_id,
-                        "transaction",
-                    )
-                ),
-                inner_tag_value,
-            ],
-        )
-
-    if transaction_name in [is_unparameterized, is_null]:
-        transaction_name_filter = generate_transaction_name_filter("equals", transaction_name)
-    elif transaction_name == has_value:
-        transaction_name_filter = Function(
-            "and",
-            [
-                generate_transaction_name_filter("notEquals", is_null),
-                generate_transaction_name_filter("notEquals", is_unparameterized),
-            ],
-        )
-    else:
+    transaction_name_filter = _TRANSACTION_NAME_FILTERS.get(transaction_name)
+    if transaction_name_filter is None:
         raise InvalidParams(
             f"The `count_transaction_name` function expects a valid transaction name filter, which must be either "
-            f"{is_unparameterized} {is_null} {has_value} but {transaction_name} was passed"
+            f"{' '.join(_TRANSACTION_NAME_FILTERS)} but {transaction_name} was passed"
         )
 
     return Function(
         "countIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
-                [aggregate_filter, transaction_name_filter],
+                [aggregate_filter, transaction_name_filter(org_id)],
             ),
         ],
         alias=alias,
@@ -768,8 +804,8 @@ def team_key_transaction_snql(
         "in",
         [
             (
-                Column("project_id"),
-                Column(resolve_tag_key(UseCaseID.TRANSACTIONS, org_id, "transaction")),
+                _PROJECT_ID_COLUMN,
+                _transaction_column(org_id),
             ),
             list(team_key_conditions),
         ],
@@ -777,6 +813,9 @@ def team_key_transaction_snql(
     )
 
 
+# The satisfaction, tolerated and total transaction snippets of a query all need the same threshold config, so it's
+# resolved once per request on top of the cache of the underlying threshold rows.
+@request_cache
 def _resolve_project_threshold_config(project_ids: Sequence[int], org_id: int) -> SelectType:
     return resolve_project_threshold_config(
         tag_value_resolver=lambda use_case_id, org_id, value: resolve_tag_value(
@@ -803,7 +842,7 @@ def operation_if_column_snql(
     return Function(
         operation,
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
@@ -811,8 +850,8 @@ def operation_if_column_snql(
                     Function(
                         "equals",
                         [
-                            Column(resolve_tag_key(use_case_id, org_id, if_column)),
-                            resolve_tag_value(use_case_id, org_id, if_value),
+                            Column(_resolve_tag_key(use_case_id, org_id, if_column)),
+                            _resolve_tag_value(use_case_id, org_id, if_value),
                         ],
                     ),
                 ],
@@ -878,7 +917,7 @@ def max_timestamp(
 
 
 def total_count(aggregate_filter: Function, alias: Optional[str] = None) -> Function:
-    return Function("sumIf", [Column("value"), aggregate_filter], alias=alias)
+    return Function("sumIf", [_VALUE_COLUMN, aggregate_filter], alias=alias)
 
 
 def on_demand_failure_rate_snql_factory(
@@ -904,7 +943,7 @@ def on_demand_failure_count_snql_factory(
     return Function(
         "sumIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
@@ -931,7 +970,7 @@ def on_demand_apdex_snql_factory(
     satisfactory = Function(
         "sumIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
@@ -953,7 +992,7 @@ def on_demand_apdex_snql_factory(
             Function(
                 "sumIf",
                 [
-                    Column("value"),
+                    _VALUE_COLUMN,
                     Function(
                         "and",
                         [
@@ -988,7 +1027,7 @@ def on_demand_count_web_vitals_snql_factory(
     return Function(
         "sumIf",
         [
-            Column("value"),
+            _VALUE_COLUMN,
             Function(
                 "and",
                 [
@@ -1029,7 +1068,7 @@ def on_demand_user_misery_snql_factory(
     miserable_users = uniq_if_column_snql(
         aggregate_filter, org_id, use_case_id, "satisfaction", "frustrated"
     )
-    unique_users = Function("uniqIf", [Column("value"), aggregate_filter])
+    unique_users = Function("uniqIf", [_VALUE_COLUMN, aggregate_filter])
     # (count_miserable(users, threshold) + 5.8875) / (count_unique(users) + 5.8875 + 111.8625)
     # https://github.com/getsentry/sentry/blob/b29efaef31605e2e2247128de0922e8dca576a22/src/sentry/search/events/datasets/discover.py#L206-L230
     return Function(
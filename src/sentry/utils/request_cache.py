@@ -1,3 +1,4 @@
+import functools
 import threading
 from typing import Any, Callable
 
@@ -16,6 +17,7 @@ def request_cache(func: Callable[..., Any]) -> Callable[..., Any]:
     Use primitive types as arguments
     """
 
+    @functools.wraps(func)
     def wrapped(*args: Any, **kwargs: Any) -> Any:
         # if no request, skip cache
         if app.env.request is None:
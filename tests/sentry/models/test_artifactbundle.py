@@ -1,4 +1,11 @@
-from sentry.models.artifactbundle import ArtifactBundleFlatFileIndex
+import zipfile
+from io import BytesIO
+
+from sentry.models.artifactbundle import (
+    ArtifactBundleArchive,
+    ArtifactBundleFlatFileIndex,
+    SourceFileType,
+)
 from sentry.testutils.cases import TestCase
 from sentry.testutils.silo import region_silo_test
 from sentry.utils import json
@@ -73,3 +80,116 @@ class ArtifactBundleTest(TestCase):
         flat_file_index = index.load_flat_file_index()
         assert flat_file_index is not None
         assert json.loads(flat_file_index) == updated_file_contents
+
+
+def test_source_file_type_from_lowercase_key():
+    assert SourceFileType.from_lowercase_key("source") == SourceFileType.SOURCE
+    assert SourceFileType.from_lowercase_key("minified_source") == SourceFileType.MINIFIED_SOURCE
+    assert SourceFileType.from_lowercase_key("source_map") == SourceFileType.SOURCE_MAP
+    assert (
+        SourceFileType.from_lowercase_key("indexed_ram_bundle") == SourceFileType.INDEXED_RAM_BUNDLE
+    )
+    assert SourceFileType.from_lowercase_key("SOURCE") is None
+    assert SourceFileType.from_lowercase_key("unknown") is None
+    assert SourceFileType.from_lowercase_key(None) is None
+
+
+def make_artifact_bundle_archive(files):
+    compressed = BytesIO()
+    with zipfile.ZipFile(compressed, mode="w") as zip_file:
+        for file_path, info in files.items():
+            zip_file.writestr(file_path, info.pop("content"))
+
+        zip_file.writestr("manifest.json", json.dumps({"files": files}))
+    compressed.seek(0)
+
+    return ArtifactBundleArchive(compressed)
+
+
+@region_silo_test(stable=True)
+class ArtifactBundleArchiveTest(TestCase):
+    def setUp(self):
+        self.archive = make_artifact_bundle_archive(
+            {
+                "path/in/zip/foo": {
+                    "url": "~/app.js",
+                    "type": "minified_source",
+                    "content": b"app_js",
+                    "headers": {"Debug-Id": "f206e0e7-3d0c-41cb-bccc-11b716728e27"},
+                },
+                "path/in/zip/bar": {
+                    "url": "~/app.js.map",
+                    "type": "source_map",
+                    "content": b"app_js_map",
+                },
+            }
+        )
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_memory_maps_are_built_lazily(self):
+        assert "_entries_by_url" not in self.archive.__dict__
+        assert "_entries_by_debug_id" not in self.archive.__dict__
+        assert self.archive.artifact_count == 2
+
+        file, headers = self.archive.get_file_by_url("~/app.js.map")
+        assert file.read() == b"app_js_map"
+        assert headers == {}
+        assert "_entries_by_url" in self.archive.__dict__
+        assert "_entries_by_debug_id" not in self.archive.__dict__
+
+        file, headers = self.archive.get_file_by_debug_id(
+            "f206e0e7-3d0c-41cb-bccc-11b716728e27", SourceFileType.MINIFIED_SOURCE
+        )
+        assert file.read() == b"app_js"
+        assert headers == {"Debug-Id": "f206e0e7-3d0c-41cb-bccc-11b716728e27"}
+        assert list(self.archive.get_all_debug_ids()) == [
+            ("f206e0e7-3d0c-41cb-bccc-11b716728e27", SourceFileType.MINIFIED_SOURCE)
+        ]
+
+    def test_get_files_by_url_or_debug_id(self):
+        assert list(self.archive.get_files_by_url_or_debug_id(None)) == [
+            "path/in/zip/foo",
+            "path/in/zip/bar",
+        ]
+        assert list(self.archive.get_files_by_url_or_debug_id("APP.JS")) == [
+            "path/in/zip/foo",
+            "path/in/zip/bar",
+        ]
+        assert list(self.archive.get_files_by_url_or_debug_id(".map")) == ["path/in/zip/bar"]
+        assert list(self.archive.get_files_by_url_or_debug_id("11b716728e27")) == [
+            "path/in/zip/foo"
+        ]
+        assert list(
+            self.archive.get_files_by_url_or_debug_id("f206e0e73d0c41cbbccc11b716728e27")
+        ) == ["path/in/zip/foo"]
+        assert self.archive.get_files_by_url_or_debug_id("index.js") == {}
+
+    def test_debug_ids_of_files_sharing_a_url(self):
+        archive = make_artifact_bundle_archive(
+            {
+                "path/in/zip/foo": {
+                    "url": "~/app.js",
+                    "type": "minified_source",
+                    "content": b"app_js",
+                    "headers": {"debug-id": "f206e0e7-3d0c-41cb-bccc-11b716728e27"},
+                },
+                "path/in/zip/bar": {
+                    "url": "~/app.js",
+                    "type": "minified_source",
+                    "content": b"other_app_js",
+                    "headers": {"debug-id": "6b7d4b7a-3b8e-4c52-9f2a-1b2c3d4e5f60"},
+                },
+            }
+        )
+
+        with archive:
+            assert sorted(archive.get_all_debug_ids()) == [
+                ("6b7d4b7a-3b8e-4c52-9f2a-1b2c3d4e5f60", SourceFileType.MINIFIED_SOURCE),
+                ("f206e0e7-3d0c-41cb-bccc-11b716728e27", SourceFileType.MINIFIED_SOURCE),
+            ]
+            file, _ = archive.get_file_by_debug_id(
+                "f206e0e7-3d0c-41cb-bccc-11b716728e27", SourceFileType.MINIFIED_SOURCE
+            )
+            assert file.read() == b"app_js"
@@ -1,14 +1,24 @@
 from unittest.mock import patch
 
 import pytest
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished
+from django.http import HttpRequest
 from snuba_sdk import Column, Function
 
+from sentry import app
 from sentry.models.transaction_threshold import (
     ProjectTransactionThreshold,
     ProjectTransactionThresholdOverride,
     TransactionMetric,
     get_project_threshold_cache_key,
 )
+from sentry.search.events.constants import (
+    DEFAULT_PROJECT_THRESHOLD_METRIC,
+    PROJECT_THRESHOLD_CONFIG_ALIAS,
+    PROJECT_THRESHOLD_CONFIG_INDEX_ALIAS,
+)
+from sentry.search.events.datasets.function_aliases import resolve_project_threshold_config
 from sentry.sentry_metrics import indexer
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.sentry_metrics.utils import resolve_tag_key, resolve_tag_value, resolve_weak
@@ -91,6 +101,12 @@ class DerivedMetricSnQLTestCase(TestCase):
             }
         )
 
+    def tearDown(self):
+        # remove the request and trigger the signal to clear the request cache
+        app.env.clear()
+        request_finished.send(sender=WSGIHandler)
+        super().tearDown()
+
     def test_counter_sum_aggregation_on_session_status(self):
         for status, func in [
             ("init", all_sessions),
@@ -459,6 +475,22 @@ class DerivedMetricSnQLTestCase(TestCase):
         threshold_override.assert_called_once()
         threshold.assert_called_once()
 
+    @patch("sentry.models.transaction_threshold.ProjectTransactionThresholdOverride.objects.filter")
+    @patch("sentry.models.transaction_threshold.ProjectTransactionThreshold.objects.filter")
+    def test_project_threshold_called_once_per_request(self, threshold_override, threshold):
+        app.env.request = HttpRequest()
+        with patch.object(cache, "get", return_value=None):
+            satisfaction_count_transaction(
+                [self.project.id], self.organization.id, self.metric_ids, "transaction.tolerated"
+            )
+            tolerated_count_transaction(
+                [self.project.id], self.organization.id, self.metric_ids, "transaction.tolerated"
+            )
+
+            # The threshold config is memoized for the duration of the request, even if the cache is missed.
+            threshold_override.assert_called_once()
+            threshold.assert_called_once()
+
     @patch("sentry.models.transaction_threshold.ProjectTransactionThresholdOverride.objects.filter")
     @patch("sentry.models.transaction_threshold.ProjectTransactionThreshold.objects.filter")
     def test_project_threshold_called_each_time_with_invalid_cache(
@@ -479,6 +511,56 @@ class DerivedMetricSnQLTestCase(TestCase):
             assert threshold_override.call_count == 3
             assert threshold.call_count == 3
 
+    @patch("sentry.models.transaction_threshold.ProjectTransactionThresholdOverride.objects.filter")
+    @patch("sentry.models.transaction_threshold.ProjectTransactionThreshold.objects.filter")
+    def test_project_threshold_not_queried_without_projects(self, threshold_override, threshold):
+        with patch.object(cache, "get", return_value=None):
+            satisfaction_count_transaction(
+                [], self.organization.id, self.metric_ids, "transaction.satisfied"
+            )
+
+            threshold_override.assert_not_called()
+            threshold.assert_not_called()
+
+    def test_transaction_threshold_equal_to_project_threshold_is_skipped(self):
+        ProjectTransactionThreshold.objects.create(
+            project=self.project,
+            organization=self.project.organization,
+            threshold=600,
+            metric=TransactionMetric.LCP.value,
+        )
+        ProjectTransactionThresholdOverride.objects.create(
+            transaction="foo_transaction",
+            project=self.project,
+            organization=self.project.organization,
+            threshold=600,
+            metric=TransactionMetric.LCP.value,
+        )
+
+        project_threshold_config_index = Function(
+            "indexOf",
+            [
+                [Function("toUInt64", [self.project.id])],
+                Column(name="project_id"),
+            ],
+            PROJECT_THRESHOLD_CONFIG_INDEX_ALIAS,
+        )
+        assert resolve_project_threshold_config(
+            tag_value_resolver=resolve_tag_value,
+            column_name_resolver=resolve_tag_key,
+            project_ids=[self.project.id],
+            org_id=self.organization.id,
+            use_case_id=UseCaseID.TRANSACTIONS,
+        ) == Function(
+            "if",
+            [
+                Function("equals", [project_threshold_config_index, 0]),
+                DEFAULT_PROJECT_THRESHOLD_METRIC,
+                Function("arrayElement", [["lcp"], project_threshold_config_index]),
+            ],
+            PROJECT_THRESHOLD_CONFIG_ALIAS,
+        )
+
     def test_project_thresholds_are_cached(self):
         ProjectTransactionThresholdOverride.objects.create(
             transaction="foo_transaction",